@@ -12,7 +12,8 @@ try:
         load_service_account_from_streamlit_secrets, fetch_url_text, smart_summarize,
         generate_action_items, _gemini_generate_text, tts_create_audio_bytes,
         stt_from_uploaded_bytes, analyze_emotion, estimate_audio_duration_seconds,
-        generate_flashcards, generate_todos, translate_text, export_to_pptx, render_avatar
+        generate_flashcards, generate_todos, translate_text, export_to_pptx, render_avatar,
+        _cache_key, audio_mime, extractive_summary, PPTX_AVAILABLE
     )
     COMPONENTS_OK = True
 except Exception as e:
@@ -25,29 +26,36 @@ st.write("Has STREAMLIT secrets loaded?",
          "✅ Yes" if "gemini_api_key" in st.secrets else "❌ No")
 st.write("Env key check:",
          os.environ.get("GOOGLE_API_KEY", "Not set"))
+if not COMPONENTS_OK:
     # Fallbacks to avoid app crash; functionality will be limited
-def load_service_account_from_streamlit_secrets(x): return False
-def fetch_url_text(url): return f"ERROR_FETCH: fetch_url_text not available ({url})"
-def smart_summarize(text, **kw): return text[:800]
-def generate_action_items(text, **kw): return "- (action items not available)"
-def export_to_pptx(title, bullets, actions): return None
-def _gemini_generate_text(prompt, **kw): return "Gemini not configured (fallback)."
-def tts_create_audio_bytes(text, language_code="en-IN"): return None
-def stt_from_uploaded_bytes(b, language="en-IN"): return "ERROR_STT: local fallback"
-def analyze_emotion(text): return "listening"
-def estimate_audio_duration_seconds(text): return max(1.0, len(text)/18.0)
-def generate_flashcards(text, **kw): return []
-def generate_todos(text, **kw): return []
-def translate_text(text, **kw): return text
-def render_avatar(state="listening"):
-    img = f"avatar/nova_idle.png" if state in ("idle","listening") else f"avatar/nova_{state}.png"
-    return f'<div><img id="nova_avatar" src="{img}" class="holo-avatar" width="160"/></div>'
+    def load_service_account_from_streamlit_secrets(x): return False
+    def fetch_url_text(url): return f"ERROR_FETCH: fetch_url_text not available ({url})"
+    def smart_summarize(text, **kw): return text[:800]
+    def extractive_summary(text, **kw): return text[:800]
+    def generate_action_items(text, **kw): return "- (action items not available)"
+    def export_to_pptx(title, bullets, actions): return None
+    PPTX_AVAILABLE = False
+    def _gemini_generate_text(prompt, **kw): return "Gemini not configured (fallback)."
+    def tts_create_audio_bytes(text, language_code="en-IN"): return None
+    def stt_from_uploaded_bytes(b, language="en-IN"): return "ERROR_STT: local fallback"
+    def analyze_emotion(text): return "listening"
+    def estimate_audio_duration_seconds(text): return max(1.0, len(text)/18.0)
+    def generate_flashcards(text, **kw): return []
+    def generate_todos(text, **kw): return []
+    def translate_text(text, **kw): return text
+    def _cache_key(text, **kw): return f"{hash(' '.join(text.split()).lower())}|{sorted(kw.items())}"
+    def audio_mime(b): return "audio/mpeg"
+    def render_avatar(state="listening"):
+        img = f"avatar/nova_idle.png" if state in ("idle","listening") else f"avatar/nova_{state}.png"
+        return f'<div><img id="nova_avatar" src="{img}" class="holo-avatar" width="160"/></div>'
 
 # -------------------------
 # Config & environment
 # -------------------------
 FLASK_API_BASE = os.getenv("FLASK_API_BASE", "https://pagebuddy-backend.onrender.com")
 PAGEBUDDY_API_KEY = os.getenv("PAGEBUDDY_API_KEY", "")  # optional for extension headers
+LANG_MAP = {"English":"en-IN","Hindi":"hi-IN","Telugu":"te-IN"}  # UI language -> TTS/STT locale
+CHAT_HISTORY_WINDOW = 20  # chat messages rendered unless older ones are requested
 st.set_page_config(page_title="PageBuddy — NOVA", layout="wide", page_icon="🤖")
 
 # try load optional CSS file
@@ -60,6 +68,51 @@ def local_css(fname="styles.css"):
 
 local_css()
 
+class Uncached(Exception):
+    """Raised inside a st.cache_data function to hand back .value without caching it."""
+    def __init__(self, value=None):
+        super().__init__("result not cached")
+        self.value = value
+
+# Summaries are memoized on a normalized content key (see _cache_key) so the
+# same article re-fetched or pasted with different whitespace skips Gemini.
+# Fallback results aren't memoized, so Gemini is retried once it recovers.
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_summary(key, _content, _model, _language, _style):
+    summary = smart_summarize(_content, model=_model, language=_language, style=_style, fallback=False)
+    actions = generate_action_items(_content, model=_model, language=_language)
+    if summary is None:
+        raise Uncached((extractive_summary(_content, n_sentences=6), actions))
+    return summary, actions
+
+def summary_and_actions(key, content, model, language, style):
+    try:
+        return cached_summary(key, content, model, language, style)
+    except Uncached as e:
+        return e.value
+
+# replaying the same narration shouldn't pay for another TTS API call;
+# failures (None) aren't cached so a transient TTS error isn't replayed
+@st.cache_data(show_spinner=False, max_entries=64, ttl=3600)
+def cached_tts(text, language_code="en-IN"):
+    audio = tts_create_audio_bytes(text, language_code=language_code)
+    if audio is None:
+        raise Uncached()
+    return audio
+
+def tts_bytes(text, language_code="en-IN"):
+    try:
+        return cached_tts(text, language_code=language_code)
+    except Uncached:
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def pptx_export_bytes(bullets, actions):
+    pptx_bytes = export_to_pptx("PageBuddy Export", list(bullets), list(actions))
+    if not pptx_bytes:
+        return b""
+    return pptx_bytes.getvalue() if hasattr(pptx_bytes, "getvalue") else pptx_bytes
+
 # -------------------------
 # Core injected CSS + JS (hero, holo pulse, typing, glitch)
 # We keep this as a raw string and then replace FLASK_BASE_PLACEHOLDER safely.
@@ -281,10 +334,20 @@ st.session_state.setdefault("emotion", "listening")
 st.session_state.setdefault("history", [])
 st.session_state.setdefault("memory", {})
 
-# top header and avatar
+# top header and avatar — one slot, updated in place on emotion changes
 col1, col2 = st.columns([1,4])
 with col1:
-    st.markdown(render_avatar(st.session_state.get("emotion","listening")), unsafe_allow_html=True)
+    avatar_slot = st.empty()
+    avatar_slot.markdown(render_avatar(st.session_state.get("emotion","listening")), unsafe_allow_html=True)
+
+def show_avatar(state):
+    """Draw a transient state (e.g. "thinking") without persisting it across reruns."""
+    avatar_slot.markdown(render_avatar(state), unsafe_allow_html=True)
+
+def set_avatar(state):
+    """Draw and remember the final emotion; the slot may still show a transient state."""
+    st.session_state["emotion"] = state
+    show_avatar(state)
 with col2:
     st.markdown("""
       <div class="block header">
@@ -350,13 +413,14 @@ with left_col:
             st.stop()
 
         # client-side: set thinking avatar + typing
-        st.markdown("<script>window.PageBuddy.setAvatar('thinking', false, true); window.PageBuddy.showTyping('left-typing')</script>", unsafe_allow_html=True)
+        show_avatar("thinking")
+        st.markdown("<script>window.PageBuddy.showTyping('left-typing')</script>", unsafe_allow_html=True)
         st.markdown('<div id="left-typing"></div>', unsafe_allow_html=True)
 
         # call summarization
         try:
-            summary = smart_summarize(content, model=model_choice, language=lang, style=style)
-            actions = generate_action_items(content, model=model_choice, language=lang)
+            key = _cache_key(content, model=model_choice, language=lang, style=style)
+            summary, actions = summary_and_actions(key, content, model_choice, lang, style)
         except Exception as e:
             summary = f"ERROR: summarization failed: {e}"
             actions = ""
@@ -368,7 +432,8 @@ with left_col:
         except Exception:
             emotion = "listening"
 
-        st.markdown("<script>window.PageBuddy.hideTyping('left-typing'); window.PageBuddy.setAvatar('%s', false, true);</script>" % emotion, unsafe_allow_html=True)
+        set_avatar(emotion)
+        st.markdown("<script>window.PageBuddy.hideTyping('left-typing');</script>", unsafe_allow_html=True)
 
         st.markdown("### ✨ Summary")
         st.write(summary)
@@ -390,25 +455,25 @@ with left_col:
             except Exception:
                 st.warning("Todos failed.")
 
-        if st.button("Export PPTX"):
+        # deck is only built when the download is clicked (callable data needs streamlit>=1.52);
+        # on_click="ignore" skips the rerun, which would drop this fetch_btn panel
+        if PPTX_AVAILABLE:
             try:
-                bullets = [b.strip() for b in re.split(r'\n|- ', summary) if b.strip()][:6]
-                actions_list = [a.strip() for a in re.split(r'\n|- ', actions) if a.strip()][:6]
-                pptx_bytes = export_to_pptx("PageBuddy Export", bullets, actions_list)
-                if pptx_bytes:
-                    data = pptx_bytes.getvalue() if hasattr(pptx_bytes, "getvalue") else pptx_bytes
-                    st.download_button("Download PPTX", data=data, file_name="pagebuddy_export.pptx", mime="application/vnd.openxmlformats-officedocument.presentationml.presentation")
+                bullets = tuple(b.strip() for b in re.split(r'\n|- ', summary) if b.strip())[:6]
+                actions_list = tuple(a.strip() for a in re.split(r'\n|- ', actions) if a.strip())[:6]
+                st.download_button("Download PPTX", data=lambda: pptx_export_bytes(bullets, actions_list), file_name="pagebuddy_export.pptx", mime="application/vnd.openxmlformats-officedocument.presentationml.presentation", on_click="ignore")
             except Exception:
                 st.warning("Export failed.")
+        else:
+            st.caption("PPTX export unavailable (python-pptx not installed).")
 
         # TTS narration + lipsync
         if enable_tts and st.button("🔊 Narrate Summary"):
             try:
-                lang_map = {"English":"en-IN","Hindi":"hi-IN","Telugu":"te-IN"}
                 tts_text = summary if len(summary) < 3500 else summary[:3500]
-                audio_bytes = tts_create_audio_bytes(tts_text, language_code=lang_map.get(lang,"en-IN"))
+                audio_bytes = tts_bytes(tts_text, language_code=LANG_MAP.get(lang,"en-IN"))
                 if audio_bytes:
-                    st.audio(audio_bytes, format="audio/mp3")
+                    st.audio(audio_bytes, format=audio_mime(audio_bytes))
                     dur = estimate_audio_duration_seconds(tts_text)
                     st.markdown(f"<script>window.PageBuddy.setAvatar('happy', true, true); setTimeout(()=>window.PageBuddy.setAvatar('listening', false, true), {int(dur*1000)});</script>", unsafe_allow_html=True)
                 else:
@@ -421,12 +486,21 @@ with left_col:
 with right_col:
     st.markdown("<div class='block'><h3>💬 Hologram Chat</h3></div>", unsafe_allow_html=True)
 
-    # render history
-    for msg in st.session_state["history"]:
-        if msg.get("role") == "user":
-            st.markdown(f"<div class='chat-right'>{msg.get('txt','')}</div>", unsafe_allow_html=True)
-        else:
-            st.markdown(f"<div class='chat-left'>{msg.get('txt','')}</div>", unsafe_allow_html=True)
+    # render history into one slot; Send re-renders it in place (no rerun)
+    def chat_bubble(msg):
+        side = "right" if msg.get("role") == "user" else "left"
+        return f"<div class='chat-{side}'>{msg.get('txt','')}</div>"
+
+    def render_history():
+        msgs = st.session_state["history"]
+        if not show_older:
+            msgs = msgs[-CHAT_HISTORY_WINDOW:]
+        chat_slot.markdown("\n".join(chat_bubble(m) for m in msgs), unsafe_allow_html=True)
+
+    hidden = len(st.session_state["history"]) - CHAT_HISTORY_WINDOW
+    show_older = hidden > 0 and st.checkbox(f"Show {hidden} older messages", key="show_older")
+    chat_slot = st.empty()
+    render_history()
 
     prompt = st.text_input("Ask NOVA...", key="prompt")
     if st.button("Send"):
@@ -434,8 +508,10 @@ with right_col:
             st.warning("Write a prompt.")
         else:
             st.session_state["history"].append({"role":"user","txt":prompt})
+            render_history()
             # show thinking avatar + typing
-            st.markdown("<script>window.PageBuddy.setAvatar('thinking', false, true); window.PageBuddy.showTyping('chat-typing');</script>", unsafe_allow_html=True)
+            show_avatar("thinking")
+            st.markdown("<script>window.PageBuddy.showTyping('chat-typing');</script>", unsafe_allow_html=True)
             st.markdown('<div id="chat-typing"></div>', unsafe_allow_html=True)
 
             p = f"You are NOVA, a hologram anime assistant. Reply in {lang} and style {style}. Keep concise.\\nUser:\\n{prompt}"
@@ -454,28 +530,26 @@ with right_col:
             # remove typing, append assistant
             st.markdown("<script>window.PageBuddy.hideTyping('chat-typing');</script>", unsafe_allow_html=True)
             st.session_state["history"].append({"role":"assistant","txt":res})
+            render_history()
 
             # emotion + avatar update
             try:
                 emot = analyze_emotion(res)
             except Exception:
                 emot = "listening"
-            st.markdown(f"<script>window.PageBuddy.setAvatar('{emot}', false, true);</script>", unsafe_allow_html=True)
-            st.markdown(f"<div class='chat-left'>{res}</div>", unsafe_allow_html=True)
+            set_avatar(emot)
 
             # TTS + lipsync
             if enable_tts:
                 try:
-                    audio = tts_create_audio_bytes(res, language_code={"English":"en-IN","Hindi":"hi-IN","Telugu":"te-IN"}.get(lang,"en-IN"))
+                    audio = tts_bytes(res, language_code=LANG_MAP.get(lang,"en-IN"))
                     if audio:
-                        st.audio(audio, format="audio/mp3")
+                        st.audio(audio, format=audio_mime(audio))
                         dur = estimate_audio_duration_seconds(res)
                         st.markdown(f"<script>window.PageBuddy.setAvatar('{emot}', true, true); setTimeout(()=>window.PageBuddy.setAvatar('listening', false, true), {int(dur*1000)});</script>", unsafe_allow_html=True)
                 except Exception:
                     st.markdown("<script>window.PageBuddy.triggerGlitch(600);</script>", unsafe_allow_html=True)
 
-            st.experimental_rerun()
-
 # persist memory choices
 if memory_mode:
     st.session_state.setdefault("memory", {})["fav_language"] = lang
@@ -493,53 +567,101 @@ if enable_voice_input:
 
     <script>
     (function(){
-      FLASK_BASE = f"{FLASK_API_BASE}"
+      const FLASK_BASE = "FLASK_BASE_PLACEHOLDER";
+      const WS_BASE = FLASK_BASE.replace(/^http/, "ws");
       const recordBtn = document.getElementById("pb-record");
       const wakeBtn = document.getElementById("pb-wake");
       const status = document.getElementById("pb-status");
-      let recorder, mediaStream, chunks = [], recOn=false;
-
+      let recorder, mediaStream, ws, chunks = [], recOn=false, done=false;
+
+      // Stream opus chunks over a WebSocket every 250ms so the backend can run
+      // streaming STT and send partial transcripts while the user is speaking.
+      // Server messages: {text, final} or {error}. Chunks are also kept locally:
+      // if the socket can't open or drops before the final transcript, the
+      // whole clip is POSTed to /upload-audio instead.
+      const stopMedia = () => { mediaStream && mediaStream.getTracks().forEach(t=>t.stop()); };
+      const glitch = () => {
+        document.body.classList.add('glitch');
+        setTimeout(()=>document.body.classList.remove('glitch'),700);
+      };
+      const showTranscript = async (text) => {
+        try { await navigator.clipboard.writeText(text); } catch(e){}
+        alert("Transcription copied to clipboard:\\n" + text + "\\n\\nPaste in PageBuddy prompt");
+      };
+      const uploadClip = () => {
+        if (done) return;
+        done = true;
+        if (ws && ws.readyState <= WebSocket.OPEN) ws.close();
+        const blob = new Blob(chunks, { type: recorder.mimeType || 'audio/webm' });
+        const reader = new FileReader();
+        reader.onload = async () => {
+          status.innerText = "Uploading...";
+          try {
+            const res = await fetch(FLASK_BASE + "/upload-audio", {
+              method: "POST",
+              headers: { "Content-Type":"application/json" },
+              body: JSON.stringify({ audio_b64: reader.result, language: "en-IN" })
+            });
+            const j = await res.json();
+            if (j.text) await showTranscript(j.text);
+            else alert("Transcribe error: " + JSON.stringify(j));
+          } catch(e) {
+            alert("Upload failed: " + e);
+            glitch();
+          }
+          status.innerText = "";
+        };
+        reader.readAsDataURL(blob);
+      };
       recordBtn && (recordBtn.onclick = async () => {
         if (!recOn) {
           if (!navigator.mediaDevices) { alert("Media devices not supported"); return; }
           mediaStream = await navigator.mediaDevices.getUserMedia({ audio: true });
-          recorder = new MediaRecorder(mediaStream);
-          recorder.ondataavailable = e => chunks.push(e.data);
-          recorder.onstop = async () => {
-            const blob = new Blob(chunks, { type: 'audio/webm' });
-            chunks = [];
-            const reader = new FileReader();
-            reader.onload = async () => {
-              const base64 = reader.result;
-              status.innerText = "Uploading...";
-              try {
-                const res = await fetch(FLASK_BASE + "/upload-audio", {
-                  method: "POST",
-                  headers: { "Content-Type":"application/json" },
-                  body: JSON.stringify({ audio_b64: base64, language: "en-IN" })
-                });
-                const j = await res.json();
-                if (j.text) {
-                  try { await navigator.clipboard.writeText(j.text); } catch(e){}
-                  alert("Transcription copied to clipboard:\\n" + j.text + "\\n\\nPaste in PageBuddy prompt");
-                } else {
-                  alert("Transcribe error: " + JSON.stringify(j));
-                }
-              } catch(e) {
-                alert("Upload failed: " + e);
-                document.body.classList.add('glitch');
-                setTimeout(()=>document.body.classList.remove('glitch'),700);
-              }
-              status.innerText = "";
-            };
-            reader.readAsDataURL(blob);
+          const opts = { audioBitsPerSecond: 32000 };
+          if (window.MediaRecorder && MediaRecorder.isTypeSupported('audio/webm;codecs=opus')) opts.mimeType = 'audio/webm;codecs=opus';
+          recorder = new MediaRecorder(mediaStream, opts);
+          chunks = []; done = false;
+          ws = new WebSocket(WS_BASE + "/ws/transcribe");
+          ws.binaryType = "arraybuffer";
+          recorder.ondataavailable = e => {
+            if (!e.data.size) return;
+            chunks.push(e.data);
+            if (ws.readyState === WebSocket.OPEN) ws.send(e.data);
+          };
+          recorder.onstop = () => {
+            if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ event: "end" }));
+            else uploadClip();  // stopped before the socket opened, or it dropped
+          };
+          ws.onopen = () => {
+            // Stop was clicked while connecting: the clip is already being uploaded
+            if (!recOn || done) { ws.close(); return; }
+            ws.send(JSON.stringify({ language: "en-IN", mime: recorder.mimeType }));
+            chunks.forEach(c => ws.send(c));  // catch up on audio recorded while connecting
+          };
+          ws.onmessage = async (e) => {
+            let j;
+            try { j = JSON.parse(e.data); } catch(err) { return; }
+            if (j.error) { ws.close(); return; }  // onclose falls back to upload
+            if (!j.text) return;
+            status.innerText = j.final ? "" : "… " + j.text;
+            if (j.final) {
+              done = true;
+              ws.close();
+              await showTranscript(j.text);
+            }
+          };
+          ws.onerror = () => {};  // always followed by onclose
+          ws.onclose = () => {
+            // until the recorder has flushed its last chunk, recorder.onstop
+            // sees the closed socket and uploads instead
+            if (!done && recorder.state === "inactive") uploadClip();
           };
-          recorder.start();
+          recorder.start(250);
           recOn=true; status.innerText="Recording..."; recordBtn.innerText="Stop Recording";
         } else {
-          recorder.stop();
-          mediaStream.getTracks().forEach(t=>t.stop());
-          recOn=false; recordBtn.innerText="Start/Stop Recording"; status.innerText="Processing audio...";
+          recOn=false; recordBtn.innerText="Start/Stop Recording"; status.innerText="Finishing transcript...";
+          if (recorder.state !== "inactive") recorder.stop();
+          stopMedia();
         }
       });
 
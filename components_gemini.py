@@ -10,43 +10,166 @@ Upgraded components_gemini.py (Option C)
 """
 
 import os
+import atexit
 import json
+import random
 import re
 import time
 import logging
 import base64
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import tempfile
+import threading
 import requests
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from io import BytesIO, StringIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 
-# HTML parser
-from bs4 import BeautifulSoup
+def _module_available(name: str) -> bool:
+    """find_spec without importing the module (parents of dotted names may be missing)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# HTML parser (libxml2 via lxml when installed, else the pure-Python parser)
+HTML_PARSER = "lxml" if _module_available("lxml") else "html.parser"
 
-# NLP
-import nltk
-from nltk.tokenize import sent_tokenize
-nltk.download("punkt", quiet=True)
+# Heavy optional dependencies (sklearn/numpy, python-pptx, bs4, google.cloud
+# audio clients) are imported lazily by the code paths that need them; only
+# check availability here (cheap, no import).
+SCIPY_AVAILABLE = _module_available("sklearn") and _module_available("numpy")
 
-# Vectorizer for extractive fallback
+# PPTX
+PPTX_AVAILABLE = _module_available("pptx")
+
+# Faster JSON (de)serialization for model output / credentials (stdlib fallback).
+# _dumps returns UTF-8 bytes; default=dict lets Mapping types such as
+# st.secrets sections serialize.
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    import numpy as np
-    SCIPY_AVAILABLE = True
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=dict)
 except Exception:
-    SCIPY_AVAILABLE = False
+    _loads = json.loads
 
-# PPTX
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, default=dict).encode("utf-8")
+
+# Disk-backed LLM response cache (shared across processes / restarts)
 try:
-    from pptx import Presentation
-    from pptx.util import Pt
-    PPTX_AVAILABLE = True
+    import diskcache
+    DISKCACHE_AVAILABLE = True
 except Exception:
-    PPTX_AVAILABLE = False
+    DISKCACHE_AVAILABLE = False
 
 # Logging
 logger = logging.getLogger("components_gemini")
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO)
 
+# --------- Precompiled patterns ----------
+_WS_RE = re.compile(r"\s+")
+_LIST_SPLIT_RE = re.compile(r"[\n,;]+")
+_QA_RE = re.compile(r"^\s*(?P<tag>[QA])[:\-\).\s]+(?P<body>.+)$", re.I | re.M)
+# sentence end: ./!/? or the Devanagari danda/double danda (optionally closed
+# by a quote/bracket), then whitespace not followed by a lowercase Latin letter
+# ("e.g. this" stays whole; Telugu/Hindi, which have no case, always split)
+_SENT_RE = re.compile(
+    r"(?:(?<=[.!?\u0964\u0965])|(?<=[.!?\u0964\u0965][\"'\u201d\u2019)\]]))\s+(?![a-z])"
+)
+
+# --------- Cache keys ----------
+
+def _digest(data: bytes, params) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(data)
+    for k in sorted(params):
+        h.update(f"|{k}={params[k]}".encode("utf-8"))
+    return h.hexdigest()
+
+def _cache_key(text: str, **params) -> str:
+    """
+    Content-based cache key: blake2b over the whitespace/case-normalized text
+    plus sorted params, so the same article pasted twice maps to one entry.
+    """
+    return _digest(_WS_RE.sub(" ", text).strip().lower().encode("utf-8"), params)
+
+def _prompt_key(prompt_bytes: bytes, **params) -> str:
+    """Exact-prompt cache key over the UTF-8 prompt (no normalization: the model sees it verbatim)."""
+    return _digest(prompt_bytes, params)
+
+# --------- LLM response cache (memory LRU, optional disk) ----------
+LLM_CACHE_MAX = 512
+LLM_CACHE_MAX_TEMPERATURE = 0.5  # more creative sampling is not worth replaying
+LLM_CACHE_DIR = os.getenv("PAGEBUDDY_LLM_CACHE", "/tmp/pagebuddy_llm_cache")
+
+_LLM_CACHE = OrderedDict()
+_LLM_CACHE_LOCK = threading.Lock()
+_DISK_CACHE = None
+if DISKCACHE_AVAILABLE:
+    try:
+        _DISK_CACHE = diskcache.Cache(LLM_CACHE_DIR, size_limit=2**28)
+    except Exception as e:
+        logger.warning("diskcache unavailable at %s: %s", LLM_CACHE_DIR, e)
+
+def _llm_cache_put(key, value, disk=True):
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE[key] = value
+        _LLM_CACHE.move_to_end(key)
+        while len(_LLM_CACHE) > LLM_CACHE_MAX:
+            _LLM_CACHE.popitem(last=False)
+    if disk and _DISK_CACHE is not None:
+        try:
+            _DISK_CACHE.set(key, value)
+        except Exception as e:
+            logger.debug("diskcache set failed: %s", e)
+
+def _llm_cache_get(key):
+    with _LLM_CACHE_LOCK:
+        if key in _LLM_CACHE:
+            _LLM_CACHE.move_to_end(key)
+            return _LLM_CACHE[key]
+    if _DISK_CACHE is None:
+        return None
+    try:
+        value = _DISK_CACHE.get(key)
+    except Exception as e:
+        logger.debug("diskcache get failed: %s", e)
+        return None
+    if value is not None:
+        _llm_cache_put(key, value, disk=False)
+    return value
+
+# Final strings (fetched pages, summaries) live in the same disk cache under
+# their own namespaces, so a repeat request skips even the prompt/parse work.
+FETCH_CACHE_TTL = 3600  # pages change; summaries of a given text do not
+
+def _disk_get(namespace, key):
+    if _DISK_CACHE is None:
+        return None
+    try:
+        return _DISK_CACHE.get(f"{namespace}:{key}")
+    except Exception as e:
+        logger.debug("diskcache get failed: %s", e)
+        return None
+
+def _disk_set(namespace, key, value, expire=None):
+    if _DISK_CACHE is None:
+        return
+    try:
+        _DISK_CACHE.set(f"{namespace}:{key}", value, expire=expire)
+    except Exception as e:
+        logger.debug("diskcache set failed: %s", e)
+
 # --------- Gemini / Vertex detection ----------
 GEN_CLIENT = None
 genai = None
@@ -82,16 +205,17 @@ if GEN_CLIENT is None:
 logger.info("GEN_CLIENT: %s", GEN_CLIENT)
 
 # --------- Google Cloud TTS/STT detection ----------
-GCP_AUDIO = False
-texttospeech = None
-speech = None
-try:
-    from google.cloud import texttospeech as tts_mod, speech as speech_mod
-    texttospeech = tts_mod
-    speech = speech_mod
-    GCP_AUDIO = True
-except Exception:
-    GCP_AUDIO = False
+GCP_AUDIO = _module_available("google.cloud.texttospeech") and _module_available("google.cloud.speech")
+
+@functools.lru_cache(maxsize=1)
+def _gcp_texttospeech():
+    from google.cloud import texttospeech
+    return texttospeech
+
+@functools.lru_cache(maxsize=1)
+def _gcp_speech():
+    from google.cloud import speech
+    return speech
 
 # --------- Helper: write service account json from secrets (Streamlit) ----------
 def load_service_account_from_streamlit_secrets(st_secrets):
@@ -106,12 +230,12 @@ def load_service_account_from_streamlit_secrets(st_secrets):
         if not creds:
             return False
         if isinstance(creds, str):
-            cred_dict = json.loads(creds)
+            cred_dict = _loads(creds)
         else:
             cred_dict = creds
         path = "/tmp/gcp_pagebuddy_creds.json"
-        with open(path, "w") as f:
-            json.dump(cred_dict, f)
+        with open(path, "wb") as f:
+            f.write(_dumps(cred_dict))
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = path
         logger.info("Wrote GCP credentials to %s", path)
         # If genai present, try configure (ADC will be used by GCP libs)
@@ -128,43 +252,159 @@ def load_service_account_from_streamlit_secrets(st_secrets):
         logger.exception("load_service_account_from_streamlit_secrets failed: %s", e)
         return False
 
+# --------- Shared HTTP session (keep-alive connection pool) ----------
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                       max_retries=Retry(total=2, backoff_factor=0.3))
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.headers.update({"User-Agent": "PageBuddy/1.0 (+https://example.com)"})
+atexit.register(_SESSION.close)
+
 # --------- Fetch readable text from URL ----------
-def fetch_url_text(url: str) -> str:
-    """Return visible text from a URL (best-effort)."""
+FETCH_TIMEOUT = 8  # seconds, connect + per-read
+MAX_FETCH_BYTES = 500_000  # stop downloading past this; article text is long done by then
+@functools.lru_cache(maxsize=1)
+def _bs4():
+    """(BeautifulSoup, content strainer), imported on first fetch."""
+    from bs4 import BeautifulSoup, SoupStrainer
+    # <body> already contains every p/h*/li, so matching those too only costs per-tag checks
+    return BeautifulSoup, SoupStrainer(["main", "article", "body"])
+
+def _soup_text(soup) -> str:
+    """Visible text, one whitespace-collapsed string per line, streamed into a single buffer."""
+    buf = StringIO()
+    for s in soup.stripped_strings:
+        # split()/join runs in C string code, faster than _WS_RE.sub for this
+        buf.write(" ".join(s.split()))
+        buf.write("\n")
+    return buf.getvalue()
+
+def fetch_url_text(url: str, timeout=FETCH_TIMEOUT) -> str:
+    """Return visible text from a URL (best-effort), cached on disk for FETCH_CACHE_TTL."""
+    cached = _disk_get("fetch", url)
+    if cached is not None:
+        return cached
+    text = _fetch_url_text_uncached(url, timeout=timeout)
+    if not text.startswith("ERROR_FETCH"):
+        _disk_set("fetch", url, text, expire=FETCH_CACHE_TTL)
+    return text
+
+def _fetch_url_text_uncached(url: str, timeout=FETCH_TIMEOUT) -> str:
+    """Download and extract visible text via the shared pooled session."""
     try:
-        headers = {"User-Agent": "PageBuddy/1.0 (+https://example.com)"}
-        r = requests.get(url, timeout=8, headers=headers)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        buf = bytearray()
+        with _SESSION.get(url, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            # trust the header charset only when one is declared: without it
+            # requests reports ISO-8859-1 for text/*, which would override <meta charset>
+            encoding = r.encoding if "charset" in r.headers.get("Content-Type", "").lower() else None
+            for chunk in r.iter_content(chunk_size=65536):
+                buf.extend(chunk)
+                if len(buf) >= MAX_FETCH_BYTES:
+                    break
+        # parse only content subtrees (skips <head> etc.)
+        BeautifulSoup, content_tags = _bs4()
+        soup = BeautifulSoup(bytes(buf[:MAX_FETCH_BYTES]), HTML_PARSER,
+                             parse_only=content_tags, from_encoding=encoding)
         for tag in soup(["script", "style", "noscript", "header", "footer", "form"]):
             tag.extract()
-        text = soup.get_text(separator="\n", strip=True)
-        # compress whitespace
-        text = re.sub(r"\n{2,}", "\n\n", text)
-        return text.strip()
+        # stripped_strings never yields empty strings, so no blank-line collapse is needed
+        return _soup_text(soup).strip()
     except Exception as e:
         logger.warning("fetch_url_text failed for %s: %s", url, e)
         return f"ERROR_FETCH: Could not fetch {url} ({e})"
 
 # compatibility wrapper older code used
-def extract_text_from_url(url: str) -> str:
-    return fetch_url_text(url)
+def extract_text_from_url(url: str, timeout=FETCH_TIMEOUT) -> str:
+    return fetch_url_text(url, timeout=timeout)
+
+# --------- LLM concurrency cap + retry ----------
+# Fewer concurrent requests keeps us under Gemini rate limits; a 429 retry
+# storm costs far more tail latency than briefly queueing behind the cap.
+LLM_MAX_CONCURRENCY = 4
+LLM_MAX_ATTEMPTS = 3
+_LLM_SEM = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_RETRYABLE_ERRORS = ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+                     "InternalServerError", "DeadlineExceeded")
+
+def _is_retryable(exc):
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return type(exc).__name__ in _RETRYABLE_ERRORS
+
+def _call_llm(fn, *args, **kwargs):
+    """
+    Run one model request under the concurrency cap, retrying 429/5xx with
+    jittered exponential backoff (0.5s, 1s, ... capped at 4s). The slot is
+    released while sleeping so other callers can proceed.
+    """
+    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+        try:
+            with _LLM_SEM:
+                return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == LLM_MAX_ATTEMPTS or not _is_retryable(e):
+                raise
+            delay = min(4.0, 0.5 * 2 ** (attempt - 1)) + random.uniform(0, 0.5)
+            logger.info("LLM call failed (%s), retry %d in %.2fs", e, attempt, delay)
+            time.sleep(delay)
 
 # --------- Gemini wrapper (unified) ----------
-def _gemini_generate_text(prompt: str, model="gemini-1.5-flash", max_output_tokens=400, temperature=0.2, **kwargs):
+# Model handles are reused per model name instead of rebuilt on every call.
+@functools.lru_cache(maxsize=4)
+def _genai_model(name: str):
+    return genai.GenerativeModel(name)
+
+@functools.lru_cache(maxsize=4)
+def _vertex_model(name: str):
+    from vertexai import language as vlang
+    return vlang.TextGenerationModel.from_pretrained(name)
+
+def _llm_key(prompt_bytes: bytes, model, max_output_tokens, temperature, response_mime_type=None) -> str:
+    """LLM response cache key for one request (mime type only joins the key when set)."""
+    params = {"model": model, "max_output_tokens": int(max_output_tokens), "temperature": float(temperature)}
+    if response_mime_type:
+        params["response_mime_type"] = response_mime_type
+    return _prompt_key(prompt_bytes, **params)
+
+def _gemini_generate_text(prompt: str, model="gemini-1.5-flash", max_output_tokens=400, temperature=0.2, use_cache=True,
+                          response_mime_type=None, **kwargs):
     """
     Generate text using available client.
+    Identical prompts (same model/max tokens/temperature <= 0.5) are served from
+    the LLM response cache unless use_cache=False. Failures are not cached.
+    response_mime_type="application/json" asks genai for structured output
+    (ignored by the other clients; callers still parse defensively).
     Returns string or None on failure.
     """
+    # encode once; the same buffer feeds the cache key and the size log
+    prompt_bytes = prompt.encode("utf-8")
+    cacheable = use_cache and float(temperature) <= LLM_CACHE_MAX_TEMPERATURE
+    if cacheable:
+        key = _llm_key(prompt_bytes, model, max_output_tokens, temperature, response_mime_type)
+        cached = _llm_cache_get(key)
+        if cached is not None:
+            return cached
+    logger.debug("LLM request model=%s prompt_bytes=%d", model, len(prompt_bytes))
+    out = _gemini_generate_uncached(prompt, model=model, max_output_tokens=max_output_tokens, temperature=temperature,
+                                    response_mime_type=response_mime_type)
+    if cacheable and out:
+        _llm_cache_put(key, out)
+    return out
+
+def _gemini_generate_uncached(prompt: str, model="gemini-1.5-flash", max_output_tokens=400, temperature=0.2,
+                              response_mime_type=None):
     try:
         if GEN_CLIENT == "genai" and genai:
             try:
                 # Use new high-level API: GenerativeModel
-                model_obj = genai.GenerativeModel(model)
-                response = model_obj.generate_content(
-                    prompt,
-                    **{"generation_config": {"max_output_tokens": int(max_output_tokens), "temperature": float(temperature)}}
-                )
+                model_obj = _genai_model(model)
+                generation_config = {"max_output_tokens": int(max_output_tokens), "temperature": float(temperature)}
+                if response_mime_type:
+                    generation_config["response_mime_type"] = response_mime_type
+                response = _call_llm(model_obj.generate_content, prompt, generation_config=generation_config)
                 # response.text is the common field
                 text = getattr(response, "text", None)
                 if text:
@@ -177,7 +417,7 @@ def _gemini_generate_text(prompt: str, model="gemini-1.5-flash", max_output_toke
                 logger.exception("genai generate_content failed: %s", e)
                 # Try older convenience API
                 try:
-                    resp = genai.generate_text(model=model, prompt=prompt, max_output_tokens=max_output_tokens, temperature=temperature)
+                    resp = _call_llm(genai.generate_text, model=model, prompt=prompt, max_output_tokens=max_output_tokens, temperature=temperature)
                     if isinstance(resp, dict):
                         return resp.get("candidates",[{}])[0].get("content","").strip()
                     return getattr(resp, "text", getattr(resp, "content", str(resp))).strip()
@@ -186,9 +426,8 @@ def _gemini_generate_text(prompt: str, model="gemini-1.5-flash", max_output_toke
                     return None
         elif GEN_CLIENT == "vertexai" and vertexai:
             try:
-                from vertexai import language as vlang
-                model_obj = vlang.TextGenerationModel.from_pretrained(model)
-                response = model_obj.predict(prompt, max_output_tokens=max_output_tokens, temperature=temperature)
+                model_obj = _vertex_model(model)
+                response = _call_llm(model_obj.predict, prompt, max_output_tokens=max_output_tokens, temperature=temperature)
                 return getattr(response, "text", None) or str(response)
             except Exception as e:
                 logger.exception("vertexai generation failed: %s", e)
@@ -200,53 +439,313 @@ def _gemini_generate_text(prompt: str, model="gemini-1.5-flash", max_output_toke
         logger.exception("_gemini_generate_text unexpected error: %s", e)
         return None
 
+# --------- Prompt budgets ----------
+# Budgets are counted in UTF-8 bytes rather than characters: Devanagari/Telugu
+# characters are 3 bytes and cost Gemini more tokens per character than ASCII.
+BYTES_PER_TOKEN = 4  # rough average for Gemini tokenization of English prose
+_BUDGETS = {  # tokens of article text per prompt
+    "flashcards": 3750,
+    "translate": 3000,
+    "sentiment": 1250,
+}
+
+def _clip(text: str, budget_tokens: int) -> str:
+    """Prefix of text within ~budget_tokens; returns text itself (no copy) if it already fits."""
+    limit = budget_tokens * BYTES_PER_TOKEN
+    if len(text) <= limit // 4:  # fits even at 4 bytes per character
+        return text
+    if text.isascii():
+        return text if len(text) <= limit else text[:limit]
+    data = text.encode("utf-8")
+    if len(data) <= limit:
+        return text
+    # "ignore" drops a multi-byte character cut in half at the boundary
+    return data[:limit].decode("utf-8", "ignore")
+
+# --------- Map-reduce over long articles ----------
+# Long inputs are split into ~2000-token chunks summarized in parallel, then
+# reduced with one final call, instead of truncating the article.
+CHUNK_CHARS = 8000
+MAP_REDUCE_MIN_CHARS = 16000
+MAX_MAP_CHUNKS = 8  # ~64k chars; anything past that is clipped, not mapped
+# fewer than the process-wide LLM slots, so one long article can't starve
+# other sessions' chat/summary calls
+MAP_WORKERS = max(1, LLM_MAX_CONCURRENCY // 2)
+
+def _chunk_text(text: str, size=CHUNK_CHARS):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def _summarize_chunk(chunk: str, model="gemini-1.5-flash", language="English", use_cache=True):
+    """Summarize one chunk; partials are cached per chunk by the LLM response cache."""
+    prompt = f"Summarize this part of an article in 3 short bullets. Language: {language}.\n\n{chunk}"
+    return _gemini_generate_text(prompt, model=model, max_output_tokens=120, temperature=0.12, use_cache=use_cache)
+
+def _map_summaries(text: str, model="gemini-1.5-flash", language="English", use_cache=True):
+    """Return the non-empty partial summaries of text's first MAX_MAP_CHUNKS chunks (map step)."""
+    chunks = _chunk_text(_clip(text, MAX_MAP_CHUNKS * CHUNK_CHARS // BYTES_PER_TOKEN))
+    with ThreadPoolExecutor(max_workers=MAP_WORKERS) as ex:
+        partials = list(ex.map(lambda c: _summarize_chunk(c, model=model, language=language, use_cache=use_cache), chunks))
+    return [p.strip() for p in partials if p and p.strip()]
+
+# --------- Fused article analysis (one round trip) ----------
+# summary/actions/todos/topics/sentiment/flashcards used to be six separate calls that
+# each re-sent the article; one JSON prompt now returns all of them and the
+# individual helpers below read from the memoized result.
+ANALYSIS_CACHE_MAX = 64
+ANALYSIS_FLASHCARDS = 8  # generate_flashcards' default count
+ANALYSIS_MAX_TOKENS = 2048  # room for 8 cards in Hindi/Telugu without truncating the JSON
+
+@dataclass
+class ArticleAnalysis:
+    summary: str = ""
+    actions: list = field(default_factory=list)
+    todos: list = field(default_factory=list)
+    topics: list = field(default_factory=list)
+    sentiment: str = "neutral"
+    flashcards: list = field(default_factory=list)
+    language: str = "English"
+    style: str = "anime"
+
+_ANALYSIS_CACHE = OrderedDict()
+_ANALYSIS_LOCK = threading.Lock()
+# single-flight: concurrent callers for the same article wait on one request
+_ANALYSIS_INFLIGHT = {}
+
+def _as_list(value):
+    if isinstance(value, str):
+        value = _LIST_SPLIT_RE.split(value)
+    items = [str(v).strip("-•* \t") for v in (value or [])]
+    return [v for v in items if v]
+
+@contextlib.contextmanager
+def _single_flight(key):
+    """Serialize work per key; the lock entry is dropped once nobody holds or waits on it."""
+    with _ANALYSIS_LOCK:
+        entry = _ANALYSIS_INFLIGHT.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _ANALYSIS_LOCK:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _ANALYSIS_INFLIGHT.pop(key, None)
+
+def _cached_analysis(text: str, model="gemini-1.5-flash"):
+    key = _cache_key(text, model=model)
+    with _ANALYSIS_LOCK:
+        hit = _ANALYSIS_CACHE.get(key)
+        if hit is not None:
+            _ANALYSIS_CACHE.move_to_end(key)
+        return hit
+
+def analyze_article(text: str, model="gemini-1.5-flash", language="English", style="anime", use_cache=True):
+    """
+    Single Gemini call returning summary, action items, todos, topics, sentiment and flashcards.
+    Memoized per (normalized text, model); reused while language/style match.
+    Returns ArticleAnalysis, or None if the model is unavailable or the JSON unparsable.
+    """
+    def cache_hit():
+        hit = _cached_analysis(text, model=model) if use_cache else None
+        return hit if hit is not None and hit.language == language and hit.style == style else None
+
+    hit = cache_hit()
+    if hit is not None:
+        return hit
+    with _single_flight(_cache_key(text, model=model)):
+        # another thread may have finished this article while we waited
+        return cache_hit() or _analyze_uncached(text, model, language, style, use_cache)
+
+def _analyze_uncached(text, model, language, style, use_cache):
+    if len(text) > MAP_REDUCE_MIN_CHARS:
+        partials = _map_summaries(text, model=model, language=language, use_cache=use_cache)
+        if not partials:
+            return None
+        source = "Partial summaries of the article's sections:\n" + "\n\n".join(partials)
+    else:
+        source = f"Article:\n{text}"
+    prompt = (
+        f"You are NOVA, a calm futuristic assistant. Analyze the article and reply with ONLY a JSON object with keys: "
+        f'"summary" (4 short bullets, one string), "actions" (list of 4 concise action items), '
+        f'"todos" (list of 6 actionable to-do items), "topics" (list of 6 short topics), '
+        f'"sentiment" (one of "positive", "neutral", "negative"), '
+        f'"flashcards" (list of {ANALYSIS_FLASHCARDS} objects like {{"q": "...", "a": "..."}}). '
+        f"Language: {language}. Style: {style}.\n\n{source}"
+    )
+    # Cached only once it parses: a truncated/malformed reply stored by
+    # _gemini_generate_text would be replayed forever. A bad entry left by
+    # older versions is treated as a miss and overwritten.
+    gen = {"model": model, "max_output_tokens": ANALYSIS_MAX_TOKENS, "temperature": 0.12,
+           "response_mime_type": "application/json"}
+    key = _llm_key(prompt.encode("utf-8"), **gen) if use_cache else None
+    out = _llm_cache_get(key) if key else None
+    data = safe_json_loads(out) if out else None
+    if not isinstance(data, dict):
+        out = _gemini_generate_text(prompt, use_cache=False, **gen)
+        data = safe_json_loads(out) if out else None
+        if not isinstance(data, dict):
+            logger.debug("analyze_article: no JSON object in model output")
+            return None
+        if key:
+            _llm_cache_put(key, out)
+    summary = data.get("summary") or ""
+    if isinstance(summary, list):
+        summary = "\n".join("- " + str(b).strip() for b in summary)
+    sentiment = str(data.get("sentiment", "")).lower()
+    analysis = ArticleAnalysis(
+        summary=str(summary).strip(),
+        actions=_as_list(data.get("actions")),
+        todos=_as_list(data.get("todos")),
+        topics=_as_list(data.get("topics")),
+        sentiment=sentiment if sentiment in ("positive", "negative") else "neutral",
+        flashcards=_card_list(data.get("flashcards")),
+        language=language,
+        style=style,
+    )
+    with _ANALYSIS_LOCK:
+        _ANALYSIS_CACHE[_cache_key(text, model=model)] = analysis
+        while len(_ANALYSIS_CACHE) > ANALYSIS_CACHE_MAX:
+            _ANALYSIS_CACHE.popitem(last=False)
+    return analysis
+
+def _analysis_for(text: str, model="gemini-1.5-flash", language=None):
+    """Memoized analysis for style-independent fields; language=None accepts any."""
+    def cache_hit():
+        hit = _cached_analysis(text, model=model)
+        return hit if hit is not None and language in (None, hit.language) else None
+
+    hit = cache_hit()
+    if hit is not None:
+        return hit
+    with _single_flight(_cache_key(text, model=model)):
+        return cache_hit() or _analyze_uncached(text, model, language or "English", "anime", True)
+
 # --------- Summarization & actions ----------
-def smart_summarize(text: str, model="gemini-1.5-flash", language="English", style="anime"):
+def smart_summarize(text: str, model="gemini-1.5-flash", language="English", style="anime", use_cache=True,
+                    fallback=True):
     """
-    Primary summarization using Gemini; fallback to extractive summary.
+    Primary summarization using Gemini (via analyze_article); fallback to extractive summary.
+    Articles longer than MAP_REDUCE_MIN_CHARS are map-reduced over chunks.
+    use_cache=False bypasses the LLM response and summary caches.
+    fallback=False returns None instead of the extractive summary, so callers
+    that memoize can tell a model result from a stopgap.
     Returns text.
     """
+    key = _cache_key(text, model=model, language=language, style=style)
+    if use_cache:
+        cached = _disk_get("summary", key)
+        if cached is not None:
+            return cached
+    analysis = None
     try:
-        prompt = (
-            f"You are NOVA, a calm futuristic assistant. Summarize the article into 4 short bullets, "
-            f"then 3 concise action items and 5 short tags. Language: {language}. Style: {style}.\n\nArticle:\n{text[:16000]}"
-        )
-        out = _gemini_generate_text(prompt, model=model, max_output_tokens=420, temperature=0.12)
-        if out and len(out.strip()) > 10:
-            return out.strip()
+        analysis = analyze_article(text, model=model, language=language, style=style, use_cache=use_cache)
     except Exception as e:
         logger.warning("smart_summarize primary failed: %s", e)
-    # fallback
+    if not fallback and not (analysis and len(analysis.summary) > 10):
+        return None
+    return _summary_from(analysis, text, key)
+
+def _summary_from(analysis, text: str, key=None):
+    """Analysis summary (stored on disk under key), else the extractive fallback."""
+    if analysis and len(analysis.summary) > 10:
+        if key:
+            _disk_set("summary", key, analysis.summary)
+        return analysis.summary
+    # fallback (not stored under "summary", so Gemini is retried next time)
     return extractive_summary(text, n_sentences=6)
 
 def generate_action_items(text: str, model="gemini-1.5-flash", language="English"):
+    analysis = None
     try:
-        prompt = f"Create 4 concise action items from the text in {language}:\n\n{text[:12000]}"
-        out = _gemini_generate_text(prompt, model=model, max_output_tokens=180, temperature=0.18)
-        if out and len(out.strip())>5:
-            return out.strip()
+        analysis = _analysis_for(text, model=model, language=language)
     except Exception as e:
         logger.debug("generate_action_items failed: %s", e)
-    sents = sent_tokenize(text)
+    return _actions_from(analysis, text)
+
+def _actions_from(analysis, text: str):
+    if analysis and analysis.actions:
+        return "\n".join("- " + a for a in analysis.actions)
+    sents = _sent_tokenize(text)
     return "\n".join(["- " + s.strip() for s in sents[:4]])
 
+# --------- Sentence splitting ----------
+# A compiled regex instead of nltk Punkt: no model download or pickle load,
+# and good enough for ranking/fallback purposes.
+@functools.lru_cache(maxsize=64)
+def _sent_tokenize(text: str):
+    """
+    Sentences of text, memoized: the extractive/flashcard/topic/action
+    fallbacks often split the same article. Returns an immutable tuple.
+    """
+    return tuple(s.strip() for s in _SENT_RE.split(text.strip()) if s.strip())
+
 # --------- Extractive fallback ----------
+@functools.lru_cache(maxsize=1)
+def _hashing_vectorizer():
+    """
+    Stateless vectorizer shared across calls: hashing skips building a
+    vocabulary dict for every article (no fit needed).
+    """
+    import numpy as np
+    from sklearn.feature_extraction.text import HashingVectorizer
+    # 2**17 buckets: collisions are negligible for one article's vocabulary
+    return HashingVectorizer(n_features=2**17, alternate_sign=False, norm=None,
+                             stop_words="english", dtype=np.float32)
+
+@functools.lru_cache(maxsize=64)
+def _sentence_scores(text: str):
+    """
+    (sentences, per-sentence TF-IDF row sums) for text, memoized so
+    repeated summaries of the same article skip vectorizing.
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer
+    import numpy as np
+    sents = _sent_tokenize(text)
+    # term counts -> within-article IDF across sentences (cheap, no vocabulary)
+    X = TfidfTransformer().fit_transform(_hashing_vectorizer().transform(sents))
+    # Rows are l2-normalized, so a row sum grows only ~sqrt(terms): long
+    # sentences get a mild edge and one-word fragments ("Yes.") score ~1.
+    # (A per-term mean would invert this to ~1/sqrt(terms) and rank the
+    # shortest fragments first.) Sums come straight off the CSR arrays via
+    # reduceat over the non-empty rows only (reduceat would return the next
+    # element for a zero-length segment); empty rows stay 0.
+    counts = np.diff(X.indptr)
+    scores = np.zeros(X.shape[0], dtype=X.dtype)
+    nonempty = counts > 0
+    if nonempty.any():
+        scores[nonempty] = np.add.reduceat(X.data, X.indptr[:-1][nonempty])
+    scores.setflags(write=False)  # shared via the cache
+    return sents, scores
+
+def _top_k_indices(scores, k):
+    """Indices of the k best scores in ascending (document) order, via O(n) argpartition."""
+    import numpy as np
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    return np.sort(np.argpartition(scores, -k)[-k:])
+
 def extractive_summary(text: str, n_sentences=6):
     """
     Lightweight extractive summarizer using TF-IDF sentence scoring.
     Falls back to truncation if sklearn not available.
     """
     try:
-        sents = sent_tokenize(text)
+        sents = _sent_tokenize(text)
         if len(sents) <= n_sentences:
             return "\n".join(sents)
         if SCIPY_AVAILABLE:
-            vect = TfidfVectorizer(stop_words="english")
-            X = vect.fit_transform(sents)
-            scores = np.asarray(X.sum(axis=1)).ravel()
-            ranked = np.argsort(scores)[::-1]
-            top_idx = np.sort(ranked[:n_sentences])
-            return " ".join([sents[i] for i in top_idx])
+            # scoring= versions the key so summaries ranked by the old mean score are not reused
+            key = _cache_key(text, n_sentences=n_sentences, scoring="l2sum")
+            cached = _disk_get("extractive", key)
+            if cached is not None:
+                return cached
+            sents, scores = _sentence_scores(text)
+            top_idx = _top_k_indices(scores, n_sentences)
+            summary = " ".join([sents[i] for i in top_idx])
+            _disk_set("extractive", key, summary)
+            return summary
         else:
             # naive: pick first n sentences
             return " ".join(sents[:n_sentences])
@@ -256,65 +755,81 @@ def extractive_summary(text: str, n_sentences=6):
 
 # --------- Flashcards / topics / todos ----------
 def extract_topics(text: str, model="gemini-1.5-flash", top_n=6):
+    analysis = None
     try:
-        prompt = f"Extract {top_n} short topics/section headers from this article, comma-separated:\n\n{text[:12000]}"
-        out = _gemini_generate_text(prompt, model=model, max_output_tokens=160, temperature=0.0)
-        if out:
-            parts = re.split(r'[\n,;]+', out)
-            return [p.strip() for p in parts if p.strip()][:top_n]
+        analysis = _analysis_for(text, model=model)
     except Exception:
         logger.debug("extract_topics failed")
-    sents = sent_tokenize(text)
+    return _topics_from(analysis, text, top_n)
+
+def _topics_from(analysis, text: str, top_n=6):
+    if analysis and analysis.topics:
+        return analysis.topics[:top_n]
+    sents = _sent_tokenize(text)
     return [s[:40] for s in sents[:top_n]]
 
+def _card_list(data):
+    """Normalize a decoded JSON list into {"q","a"} cards, dropping malformed items."""
+    if not isinstance(data, list):
+        return []
+    cards = [{"q": str(c.get("q", "")).strip(), "a": str(c.get("a", "")).strip()}
+             for c in data if isinstance(c, dict)]
+    return [c for c in cards if c["q"]]
+
+def _parse_flashcards(out: str, count: int):
+    """
+    Cards from model output: the outermost JSON array (tolerating prose
+    around it), else Q/A lines. Returns a list of {"q","a"} or None.
+    """
+    start, end = out.find("["), out.rfind("]") + 1
+    if start != -1 and end > start:
+        try:
+            data = _loads(out[start:end])
+        except ValueError:
+            data = None
+        cards = _card_list(data)
+        if cards:
+            return cards[:count]
+    # Q/A line parse: one regex pass covers "Q:", "Q-", "Q)", "Q." and "Q ..."
+    cards = []
+    q = None
+    for m in _QA_RE.finditer(out):
+        body = m.group("body").strip()
+        if m.group("tag").upper() == "Q":
+            q = body
+        elif q:
+            cards.append({"q": q, "a": body})
+            q = None
+            if len(cards) == count:
+                break
+    return cards or None
+
 def generate_flashcards(text: str, model="gemini-1.5-flash", count=8, language="English"):
     """
-    Tries to get JSON from model; if not, parse Q/A pairs heuristically.
+    Reads cards from the fused article analysis when it has enough; otherwise
+    asks the model directly (JSON, else Q/A pairs parsed heuristically).
     Returns list of {"q":..,"a":..}
     """
+    try:
+        analysis = _analysis_for(text, model=model, language=language)
+        if analysis and len(analysis.flashcards) >= count:
+            return analysis.flashcards[:count]
+    except Exception as e:
+        logger.debug("generate_flashcards analysis failed: %s", e)
     try:
         prompt = (
             f"Create {count} concise flashcards (Q -> A) from the article below. Provide them as a JSON list of objects "
-            f'like [{{"q":"...", "a":"..."}}]. Language: {language}.\n\n{text[:15000]}'
+            f'like [{{"q":"...", "a":"..."}}]. Language: {language}.\n\n{_clip(text, _BUDGETS["flashcards"])}'
         )
         out = _gemini_generate_text(prompt, model=model, max_output_tokens=420, temperature=0.2)
-        if out:
-            # try to extract a JSON array from the output
-            try:
-                # find first '[' and last ']' to parse JSON blob
-                start = out.find("[")
-                end = out.rfind("]") + 1
-                if start != -1 and end != -1:
-                    blob = out[start:end]
-                    data = json.loads(blob)
-                    if isinstance(data, list):
-                        return data[:count]
-            except Exception:
-                # clean-line parse fallback
-                cards = []
-                lines = [l.strip() for l in out.splitlines() if l.strip()]
-                q, a = None, None
-                for l in lines:
-                    if re.match(r"^\s*Q[:\-\)]", l, flags=re.I):
-                        q = re.split(r"[:\-\)]\s*", l, maxsplit=1)[1].strip()
-                    elif re.match(r"^\s*A[:\-\)]", l, flags=re.I):
-                        a = re.split(r"[:\-\)]\s*", l, maxsplit=1)[1].strip()
-                    else:
-                        # sometimes "Q. ..." or numbered lists
-                        if l.lower().startswith("q "):
-                            q = l.split(" ",1)[1].strip()
-                        elif l.lower().startswith("a "):
-                            a = l.split(" ",1)[1].strip()
-                    if q and a:
-                        cards.append({"q": q, "a": a})
-                        q, a = None, None
-                if cards:
-                    return cards[:count]
+        cards = _parse_flashcards(out, count) if out else None
+        if cards:
+            return cards
     except Exception as e:
         logger.debug("generate_flashcards exception: %s", e)
 
     # last-resort extractive generation
-    sents = sent_tokenize(text)
+    sents = _sent_tokenize(text)
     cards = []
     for i in range(count):
         q = sents[i*2] if i*2 < len(sents) else f"Concept {i+1}"
@@ -323,20 +838,56 @@ def generate_flashcards(text: str, model="gemini-1.5-flash", count=8, language="
     return cards
 
 def generate_todos(text: str, model="gemini-1.5-flash", language="English"):
+    analysis = None
     try:
-        prompt = f"From the article, generate 6 actionable to-do items. Language: {language}\n\n{text[:12000]}"
-        out = _gemini_generate_text(prompt, model=model, max_output_tokens=180, temperature=0.15)
-        if out:
-            return [l.strip("-• \n\t\r") for l in out.splitlines() if l.strip()][:6]
+        analysis = _analysis_for(text, model=model, language=language)
     except Exception:
         logger.debug("generate_todos failed")
+    return _todos_from(analysis)
+
+def _todos_from(analysis):
+    if analysis and analysis.todos:
+        return analysis.todos[:6]
     # fallback
     return ["Save article","Summarize key points","Make flashcards","Find references","Share with a peer","Schedule review"]
 
 # --------- Sentiment -> Emotion mapping ----------
+# Short texts are scored locally with VADER; Gemini is only asked when the
+# lexicon score is too close to zero to call.
+VADER_MAX_CHARS = 2000
+VADER_THRESHOLD = 0.2
+VADER_UNSURE = 0.05
+
+@functools.lru_cache(maxsize=1)
+def _vader():
+    """VADER analyzer, or None if nltk or the lexicon is unavailable (not retried)."""
+    try:
+        import nltk
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        try:
+            return SentimentIntensityAnalyzer()
+        except LookupError:
+            nltk.download("vader_lexicon", quiet=True)
+            return SentimentIntensityAnalyzer()
+    except Exception as e:
+        logger.info("VADER unavailable: %s", e)
+        return None
+
 def sentiment_of_text(text: str, model="gemini-1.5-flash"):
+    hit = _cached_analysis(text, model=model)
+    if hit is not None:
+        return hit.sentiment
+    vader = _vader() if len(text) <= VADER_MAX_CHARS else None
+    if vader is not None:
+        try:
+            score = vader.polarity_scores(text)["compound"]
+            if score >= VADER_THRESHOLD: return "positive"
+            if score <= -VADER_THRESHOLD: return "negative"
+            if abs(score) >= VADER_UNSURE: return "neutral"
+        except Exception as e:
+            logger.debug("VADER sentiment unavailable: %s", e)
     try:
-        prompt = f"Provide one-word sentiment (positive/neutral/negative) for the text:\n\n{text[:5000]}"
+        prompt = f"Provide one-word sentiment (positive/neutral/negative) for the text:\n\n{_clip(text, _BUDGETS['sentiment'])}"
         out = _gemini_generate_text(prompt, model=model, max_output_tokens=32, temperature=0.0)
         if out:
             first = out.strip().splitlines()[0].lower()
@@ -354,7 +905,7 @@ def analyze_emotion(text: str):
 # --------- Translate helper ----------
 def translate_text(text: str, target_language="Hindi", model="gemini-1.5-flash"):
     try:
-        prompt = f"Translate to {target_language}:\n\n{text[:12000]}"
+        prompt = f"Translate to {target_language}:\n\n{_clip(text, _BUDGETS['translate'])}"
         out = _gemini_generate_text(prompt, model=model, max_output_tokens=400, temperature=0.0)
         if out:
             return out.strip()
@@ -363,17 +914,58 @@ def translate_text(text: str, target_language="Hindi", model="gemini-1.5-flash")
     return text
 
 # --------- TTS (GCP preferred) and fallback ----------
+# pyttsx3 drivers are slow to start and not thread-safe: one engine per
+# process, used under a lock, writing to RAM-backed tmpfs when available.
+_TTS_LOCK = threading.Lock()
+_TTS_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+@functools.lru_cache(maxsize=1)
+def _get_tts_engine():
+    """Process-wide pyttsx3 engine, or None if no driver could start (not retried)."""
+    try:
+        import pyttsx3
+        return pyttsx3.init()
+    except Exception as e:
+        logger.info("pyttsx3 unavailable: %s", e)
+        return None
+
+_VOICE_KEYWORDS = {"hi": "hindi", "te": "telugu", "en": "english"}
+
+@functools.lru_cache(maxsize=1)
+def _tts_voice_map():
+    """
+    language prefix ("hi"/"te"/"en") -> pyttsx3 voice id, scanned once per
+    process; "" maps to the engine's startup voice for unmatched languages.
+    """
+    engine = _get_tts_engine()
+    voice_map = {}
+    if engine is None:
+        return voice_map
+    try:
+        voice_map[""] = engine.getProperty("voice")
+        voices = engine.getProperty("voices") or []
+    except Exception as e:
+        logger.debug("pyttsx3 voice scan failed: %s", e)
+        return voice_map
+    for v in voices:
+        label = f"{getattr(v, 'name', '')} {getattr(v, 'id', '')}".lower()
+        for prefix, keyword in _VOICE_KEYWORDS.items():
+            if prefix not in voice_map and keyword in label:
+                voice_map[prefix] = v.id
+    return voice_map
+
 def tts_create_audio_bytes(text: str, language_code="en-IN", voice_name=None):
     """
-    Return bytes of MP3 (binary) or None on failure.
+    Return audio bytes or None on failure (see audio_mime for the container).
     Supports:
-      - Google Cloud Text-to-Speech (if GCP_AUDIO and credentials)
-      - server-side pyttsx3 fallback (if available)
+      - Google Cloud Text-to-Speech (if GCP_AUDIO and credentials) -> OGG/Opus
+      - server-side pyttsx3 fallback (if available) -> WAV
     voice_name: optional voice selector (e.g. "en-US-Neural2-C")
     """
     # prefer GCP
     try:
         if GCP_AUDIO and os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+            texttospeech = _gcp_texttospeech()
             client = texttospeech.TextToSpeechClient()
             synthesis_input = texttospeech.SynthesisInput(text=text)
             # choose voice params if provided
@@ -381,7 +973,8 @@ def tts_create_audio_bytes(text: str, language_code="en-IN", voice_name=None):
                 voice = texttospeech.VoiceSelectionParams(name=voice_name, language_code=language_code)
             else:
                 voice = texttospeech.VoiceSelectionParams(language_code=language_code, ssml_gender=texttospeech.SsmlVoiceGender.FEMALE)
-            audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+            # Opus is ~30-50% smaller than MP3 at comparable speech quality
+            audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.OGG_OPUS, sample_rate_hertz=24000)
             response = client.synthesize_speech(input=synthesis_input, voice=voice, audio_config=audio_config)
             return response.audio_content
     except Exception as e:
@@ -389,19 +982,105 @@ def tts_create_audio_bytes(text: str, language_code="en-IN", voice_name=None):
 
     # fallback to pyttsx3 (server-side)
     try:
-        import pyttsx3
-        tmp = "/tmp/pagebuddy_tts.mp3"
-        engine = pyttsx3.init()
-        # note: pyttsx3 may have different voice options per host; skip voice_name mapping
-        engine.save_to_file(text, tmp)
-        engine.runAndWait()
-        with open(tmp, "rb") as f:
-            return f.read()
+        with _TTS_LOCK:
+            engine = _get_tts_engine()
+            if engine is None:
+                return None
+            # WAV is the native output of the espeak/SAPI drivers, no transcode
+            with tempfile.NamedTemporaryFile(dir=_TTS_TMP_DIR, suffix=".wav", delete=False) as tmp:
+                path = tmp.name
+            try:
+                # voice ids differ per host; voice_name is a GCP name, so pick by language
+                voice_map = _tts_voice_map()
+                vid = voice_map.get(language_code[:2].lower()) or voice_map.get("")
+                if vid:
+                    engine.setProperty("voice", vid)
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                with open(path, "rb") as f:
+                    return f.read()
+            finally:
+                os.remove(path)
     except Exception as e:
         logger.debug("pyttsx3 fallback failed: %s", e)
     return None
 
-# --------- STT (GCP speech -> fallback to SpeechRecognition + pydub) ----------
+def audio_mime(audio_bytes) -> str:
+    """MIME type for bytes returned by tts_create_audio_bytes, sniffed from the header."""
+    head = bytes(audio_bytes[:4]) if audio_bytes else b""
+    if head == b"OggS":
+        return "audio/ogg"
+    if head == b"RIFF":
+        return "audio/wav"
+    return "audio/mpeg"
+
+# --------- STT (GCP speech -> fallback to vosk / SpeechRecognition + pydub) ----------
+VAD_AGGRESSIVENESS = 2   # webrtcvad mode 0-3
+VAD_FRAME_MS = 30
+VAD_HANGOVER_FRAMES = 10  # keep ~300 ms after speech so words don't run together
+
+def _trim_silence(seg):
+    """
+    Drop non-speech 30 ms frames (webrtcvad) before uploading to STT.
+    Returns seg unchanged if webrtcvad is missing or no speech is detected.
+    """
+    try:
+        import webrtcvad
+    except Exception:
+        return seg
+    rate = 16000
+    seg = seg.set_channels(1).set_frame_rate(rate).set_sample_width(2)
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    raw = seg.raw_data
+    frame_bytes = rate * VAD_FRAME_MS // 1000 * 2
+    voiced, hangover = bytearray(), 0
+    for i in range(0, len(raw) - frame_bytes + 1, frame_bytes):
+        frame = raw[i:i + frame_bytes]
+        if vad.is_speech(frame, rate):
+            hangover = VAD_HANGOVER_FRAMES
+        elif hangover:
+            hangover -= 1
+        else:
+            continue
+        voiced.extend(frame)
+    if not voiced:
+        return seg
+    return type(seg)(data=bytes(voiced), sample_width=2, frame_rate=rate, channels=1)
+
+# Offline recognizer (Kaldi via vosk) tried before the Google web endpoint;
+# the bundled small model is English-only.
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "/model/vosk-small-en")
+VOSK_LANGUAGE = "en"
+VOSK_RATE = 16000
+VOSK_CHUNK_BYTES = 4096
+
+@functools.lru_cache(maxsize=1)
+def _vosk_model():
+    """Loaded vosk Model, or None if vosk or the model directory is missing (not retried)."""
+    if not os.path.isdir(VOSK_MODEL_PATH):
+        return None
+    try:
+        import vosk
+        vosk.SetLogLevel(-1)
+        return vosk.Model(VOSK_MODEL_PATH)
+    except Exception as e:
+        logger.info("vosk unavailable: %s", e)
+        return None
+
+def _vosk_transcribe(seg):
+    """Transcript of a pydub segment via vosk, or None if vosk can't be used."""
+    model = _vosk_model()
+    if model is None:
+        return None
+    import vosk
+    seg = seg.set_channels(1).set_frame_rate(VOSK_RATE).set_sample_width(2)
+    # recognizers are stateful and cheap next to the model: one per call
+    rec = vosk.KaldiRecognizer(model, VOSK_RATE)
+    raw = seg.raw_data
+    for i in range(0, len(raw), VOSK_CHUNK_BYTES):
+        rec.AcceptWaveform(raw[i:i + VOSK_CHUNK_BYTES])
+    return _loads(rec.FinalResult()).get("text", "")
+
 def stt_from_uploaded_bytes(audio_bytes: bytes, language="en-IN"):
     """
     Accepts raw bytes of an audio file (any container).
@@ -410,6 +1089,7 @@ def stt_from_uploaded_bytes(audio_bytes: bytes, language="en-IN"):
     # GCP speech
     try:
         if GCP_AUDIO and os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+            speech = _gcp_speech()
             client = speech.SpeechClient()
             audio = speech.RecognitionAudio(content=audio_bytes)
             # best-effort config (let GCP auto-detect audio type)
@@ -420,18 +1100,24 @@ def stt_from_uploaded_bytes(audio_bytes: bytes, language="en-IN"):
     except Exception as e:
         logger.warning("GCP STT failed: %s", e)
 
-    # local fallback via speech_recognition + pydub
+    # local fallback via pydub -> vosk (offline), else speech_recognition
     try:
-        import speech_recognition as sr
         from pydub import AudioSegment
-        tmp_in = "/tmp/pagebuddy_in_audio"
-        with open(tmp_in, "wb") as f:
-            f.write(audio_bytes)
-        aud = AudioSegment.from_file(tmp_in)
-        out_wav = "/tmp/pagebuddy_out.wav"
-        aud.export(out_wav, format="wav")
+        # decode/re-encode in memory: no shared fixed paths between sessions
+        aud = _trim_silence(AudioSegment.from_file(BytesIO(audio_bytes)))
+        if language[:2].lower() == VOSK_LANGUAGE:
+            try:
+                text = _vosk_transcribe(aud)
+                if text:
+                    return text
+            except Exception as e:
+                logger.debug("vosk STT failed: %s", e)
+        import speech_recognition as sr
+        wav = BytesIO()
+        aud.export(wav, format="wav")
+        wav.seek(0)
         r = sr.Recognizer()
-        with sr.AudioFile(out_wav) as source:
+        with sr.AudioFile(wav) as source:
             audio = r.record(source)
         return r.recognize_google(audio)
     except Exception as e:
@@ -439,6 +1125,19 @@ def stt_from_uploaded_bytes(audio_bytes: bytes, language="en-IN"):
         return f"ERROR_STT:{e}"
 
 # --------- simple PPTX export ----------
+@functools.lru_cache(maxsize=1)
+def _pptx():
+    """(Presentation, 18pt Length), imported on first export."""
+    from pptx import Presentation
+    from pptx.util import Pt
+    return Presentation, Pt(18)
+
+def _fill_text_frame(text_frame, lines, font_size):
+    """Write lines as top-level paragraphs in one assignment, then size them."""
+    text_frame.text = "\n".join(str(l) for l in lines)
+    for p in text_frame.paragraphs:
+        p.font.size = font_size
+
 def export_to_pptx(title: str, bullets, actions, filename="pagebuddy_export.pptx"):
     """
     bullets, actions: sequences of strings
@@ -448,30 +1147,17 @@ def export_to_pptx(title: str, bullets, actions, filename="pagebuddy_export.pptx
         if not PPTX_AVAILABLE:
             logger.warning("python-pptx not available")
             return None
+        Presentation, pt18 = _pptx()
         prs = Presentation()
         # title slide
         slide = prs.slides.add_slide(prs.slide_layouts[0])
         slide.shapes.title.text = title
-        # bullets slide
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = "Key points"
-        body = slide.shapes.placeholders[1].text_frame
-        body.clear()
-        for b in bullets:
-            p = body.add_paragraph()
-            p.text = str(b)
-            p.level = 0
-            p.font.size = Pt(18)
-        # actions slide
-        slide = prs.slides.add_slide(prs.slide_layouts[1])
-        slide.shapes.title.text = "Action items"
-        body = slide.shapes.placeholders[1].text_frame
-        body.clear()
-        for a in actions:
-            p = body.add_paragraph()
-            p.text = str(a)
-            p.level = 0
-            p.font.size = Pt(18)
+        # bullets + actions slides share the "Title and Content" layout
+        content_layout = prs.slide_layouts[1]
+        for heading, lines in (("Key points", bullets), ("Action items", actions)):
+            slide = prs.slides.add_slide(content_layout)
+            slide.shapes.title.text = heading
+            _fill_text_frame(slide.placeholders[1].text_frame, lines, pt18)
         bio = BytesIO()
         prs.save(bio)
         bio.seek(0)
@@ -480,6 +1166,69 @@ def export_to_pptx(title: str, bullets, actions, filename="pagebuddy_export.pptx
         logger.exception("export_to_pptx failed: %s", e)
         return None
 
+# --------- Pipeline fan-out (summary -> emotion + narration in parallel) ----------
+def run_pipeline(text: str, model="gemini-1.5-flash", language="English", style="anime",
+                 narrate=False, language_code="en-IN"):
+    """
+    Summarize an article, then run the independent network calls that only
+    need the summary (action items, emotion, optional TTS) concurrently, so
+    latency is max() of them instead of their sum.
+    Returns {"summary", "actions", "emotion", "audio"}; audio is None unless narrate.
+    """
+    summary = smart_summarize(text, model=model, language=language, style=style)
+    tasks = {
+        "actions": functools.partial(generate_action_items, text, model=model, language=language),
+        "emotion": functools.partial(analyze_emotion, summary),
+    }
+    if narrate:
+        tasks["audio"] = functools.partial(tts_create_audio_bytes, summary, language_code=language_code)
+    result = {"summary": summary, "audio": None}
+    result.update(_fan_out(tasks, "run_pipeline"))
+    return result
+
+def pipeline(text: str, model="gemini-1.5-flash", language="English", style="anime"):
+    """
+    Summary, action items, topics and to-dos for one article from a single
+    fused analysis (one Gemini round trip on a cold article, all four parts
+    from the same reply). Parts the analysis lacks use their local fallbacks.
+    Returns {"summary", "actions", "topics", "todos"}; failed parts are None.
+    """
+    analysis = None
+    try:
+        analysis = analyze_article(text, model=model, language=language, style=style)
+    except Exception as e:
+        logger.warning("pipeline analysis failed: %s", e)
+    key = _cache_key(text, model=model, language=language, style=style)
+    # local formatting/fallbacks only (GIL-bound), so no thread pool here
+    parts = {
+        "summary": lambda: _summary_from(analysis, text, key),
+        "actions": lambda: _actions_from(analysis, text),
+        "topics": lambda: _topics_from(analysis, text),
+        "todos": lambda: _todos_from(analysis),
+    }
+    result = {}
+    for name, build in parts.items():
+        try:
+            result[name] = build()
+        except Exception as e:
+            logger.warning("pipeline %s failed: %s", name, e)
+            result[name] = None
+    return result
+
+def _fan_out(tasks, label):
+    """Run {name: callable} concurrently; returns {name: result}, None for parts that raised."""
+    with ThreadPoolExecutor(max_workers=len(tasks)) as ex:
+        futures = {name: ex.submit(fn) for name, fn in tasks.items()}
+        wait(futures.values())
+    result = {}
+    for name, fut in futures.items():
+        try:
+            result[name] = fut.result()
+        except Exception as e:
+            logger.warning("%s %s failed: %s", label, name, e)
+            result[name] = None
+    return result
+
 # --------- tiny lipsync helper (estimate durations) ----------
 def estimate_audio_duration_seconds(text: str):
     chars = max(1, len(text))
@@ -507,10 +1256,14 @@ def render_avatar(state="listening", width=160):
     """
     return html
 
+# compatibility aliases older code used
+tts_say = tts_create_audio_bytes
+speech_to_text_from_bytes = stt_from_uploaded_bytes
+
 # --------- Utilities: safe JSON parse helper ----------
 def safe_json_loads(maybe_json: str):
     try:
-        return json.loads(maybe_json)
+        return _loads(maybe_json)
     except Exception:
         # try to extract JSON substring
         try:
@@ -518,7 +1271,7 @@ def safe_json_loads(maybe_json: str):
             start = s.find("{")
             end = s.rfind("}") + 1
             if start != -1 and end != -1 and end > start:
-                return json.loads(s[start:end])
+                return _loads(s[start:end])
         except Exception:
             pass
     return None